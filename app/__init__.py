@@ -1,17 +1,11 @@
 from flask import Flask
-from config import Config
+from config import Config, DevConfig, ProdConfig
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
 # importing flask login to manage user logins
 from flask_login import LoginManager
 
-# for logging errors by email
-import logging
-from logging.handlers import SMTPHandler
-
-# for logging errors to a file
-from logging.handlers import RotatingFileHandler
 import os
 
 # Specifying the app variable as a Flask instance
@@ -21,14 +15,102 @@ app = Flask(__name__)
 #telling Flask to read and apply the config class
 #thus instead of just going ---> app.config['SECRET_KEY'] = 'asddfaef'
 #we instead have it in the config class, in one neat compartment.
-app.config.from_object(Config)
+# FLASK_CONFIG selects the environment-specific subclass from config.py: 'development'
+# pins debug mode and template auto-reload on, 'production' pins them off and turns on
+# long-lived static file caching. Unset (or any unrecognized value) falls back to the
+# base Config, preserving the behavior deployments had before the subclasses existed.
+app.config.from_object({
+    'dev': DevConfig, 'development': DevConfig,
+    'prod': ProdConfig, 'production': ProdConfig,
+}.get(os.environ.get('FLASK_CONFIG', '').lower(), Config))
+
+# Jinja compilation tuning. Flask already caches compiled templates, but the default
+# environment cache is a 400-entry LRU - replacing it with a plain dict makes it unbounded,
+# which is safe here (the template set is small and fixed) and removes the LRU bookkeeping
+# from every render. Outside debug mode, compiled bytecode is additionally persisted to a
+# shared on-disk cache, so after the first worker ever compiles a template, other workers
+# (and future restarts) just unmarshal the code object instead of re-parsing the source.
+# Debug mode is left alone: it wants auto-reloading, freshly compiled templates.
+app.jinja_env.cache = {}
+if not app.debug:
+    from jinja2 import FileSystemBytecodeCache
+    os.makedirs(app.config['JINJA_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+        app.config['JINJA_CACHE_DIR'])
+    # explicit, although this is already the default when not in debug mode: never
+    # stat template files for changes on the request path
+    app.jinja_env.auto_reload = False
 
 
 # specifying the database object
 db = SQLAlchemy(app)
+
+
+# SQLite-specific connection tuning. Under the default rollback-journal mode a single
+# writer blocks every reader, so the per-request last_seen UPDATE would stall concurrent
+# feed SELECTs. WAL mode lets readers proceed while a write is in flight. The pragmas run
+# once per DBAPI connection at checkout-creation time (the 'connect' event), which is the
+# only place SQLite accepts them; for any other database the listener returns immediately.
+#  - journal_mode=WAL:    readers don't block on the writer (and vice versa)
+#  - synchronous=NORMAL:  with WAL, fsync only at checkpoint instead of every commit;
+#                         a crash can lose the last transactions but cannot corrupt
+#  - temp_store=MEMORY:   sorts/temp B-trees stay in RAM instead of temp files
+#  - mmap_size=256MB:     page reads become memory-mapped loads, skipping read() syscalls
+# This works in tandem with the last_seen write throttle in routes.py: WAL makes each
+# write cheap and non-blocking for readers, and the throttle makes writes rare.
+import sqlalchemy as _sa
+
+
+@_sa.event.listens_for(_sa.engine.Engine, 'connect')
+def _tune_sqlite_connection(dbapi_connection, connection_record):
+    import sqlite3
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA mmap_size=268435456')
+        cursor.close()
+# N+1 query detector, development only. It watches SQLAlchemy's loader events and
+# complains (or raises, per NPLUSONE_RAISE in DevConfig) whenever a relationship is
+# lazy-loaded in a loop or an eager load goes unused - exactly the regressions that the
+# selectinload/undefer options on the feed and profile queries exist to prevent. The
+# import is inside the debug branch and tolerant of the package being absent: nplusone
+# is a development convenience, not a runtime dependency, so production images and
+# minimal dev setups that don't install it are unaffected.
+if app.debug:
+    try:
+        from nplusone.ext.flask_sqlalchemy import NPlusOne
+        NPlusOne(app)
+    except ImportError:
+        pass
+
 # specifying the database migration engine
+# Note: this import stays eager (unlike the logging ones below) because Flask-Migrate
+# registers the 'flask db' command group when Migrate() is constructed, so deferring it
+# would silently drop the migration commands from the CLI
 migrate = Migrate(app, db)
 
+# Server-side sessions, enabled only when a Redis endpoint is configured (mirroring how
+# the mail handler is gated on MAIL_SERVER). With the default client-side sessions every
+# request pays to deserialize and verify the itsdangerous-signed cookie, and the whole
+# session rides along in both directions of every request. With the Redis backend the
+# cookie shrinks to a signed session id and the lookup is one in-memory GET. The import
+# is kept inside the branch so deployments without Redis never load the dependency.
+if app.config['REDIS_URL']:
+    import redis
+    from flask_session import Session
+
+    app.config.update(
+        SESSION_TYPE='redis',
+        # non-permanent sessions expire with the browser session, matching the behavior
+        # the cookie sessions had
+        SESSION_PERMANENT=False,
+        # sign the session id cookie so ids can't be fabricated client-side
+        SESSION_USE_SIGNER=True,
+        SESSION_REDIS=redis.Redis.from_url(app.config['REDIS_URL']))
+    Session(app)
+
 # initialising flask login extension
 # similar to other extensions, Flask-Login needs to be created and initialized right after the application instance in app/__init__.py
 login = LoginManager(app)
@@ -44,7 +126,16 @@ login.login_view = 'login'
 
 # setting functionality to enable error logging by email by creating a SMTPHandler instance
 # only going to enable the email logger when the application is running without debug mode
-if not app.debug:
+if not app.debug and not getattr(app, '_logging_initialized', False):
+    # the guard above makes this whole block idempotent, so if the module is ever re-imported
+    # (or the setup gets factored into a create_app() style factory later) the handlers,
+    # background threads and queue listener are only ever created once per process
+
+    # the logging machinery (stdlib logging plus our handler subclasses) is only imported here,
+    # inside the branch that actually uses it, so short-lived CLI invocations running in debug mode
+    # don't pay the import cost at all
+    import logging
+
     # also only enabling this when the email server exists in the configuration
     if app.config['MAIL_SERVER']:
         auth = None
@@ -53,39 +144,118 @@ if not app.debug:
         secure = None
         if app.config['MAIL_USE_TLS']:
             secure = ()
-        mail_handler = SMTPHandler(
+        # using the PooledSMTPHandler subclass from app/log_handlers.py instead of the stock SMTPHandler,
+        # so that one SMTP connection (TCP + TLS + AUTH handshake) is reused across all error emails
+        # instead of being re-established for every single log record
+        from app.log_handlers import PooledSMTPHandler
+        mail_handler = PooledSMTPHandler(
             mailhost=(app.config['MAIL_SERVER'], app.config['MAIL_PORT']),
             fromaddr='no-reply@' + app.config['MAIL_SERVER'],
             toaddrs=app.config['ADMINS'], subject='Microblog Failure',
             credentials=auth, secure=secure)
         # setting its level so that it only reports errors and not warnings, informational or debugging messages
         mail_handler.setLevel(logging.ERROR)
-        # attaching to the app.logger object from Flask
-        app.logger.addHandler(mail_handler)
 
+        # Instead of attaching mail_handler directly, it is wrapped in a MemoryHandler.
+        # The MemoryHandler accumulates error records in an in-memory buffer and only forwards them
+        # to the SMTP handler in batches (when the buffer fills up, or immediately for CRITICAL records).
+        # Without this, every single error email is sent synchronously on the request thread,
+        # so a burst of errors (e.g. a failing database causing many 500s) would pay one SMTP
+        # round trip per error. With the buffer, a burst flushes in one go over the pooled connection.
+        from logging.handlers import MemoryHandler
+        import atexit
+        buffered_mail_handler = MemoryHandler(
+            capacity=100,# flush automatically once 100 records have accumulated
+            flushLevel=logging.CRITICAL,# anything CRITICAL or worse flushes the buffer immediately
+            target=mail_handler)
+        buffered_mail_handler.setLevel(logging.ERROR)
 
-    # the if statement below provides functionality for logging errors to a file
-    # creating the logs folder if it doesn't exist yet
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
+        # making sure buffered errors are not lost when the process shuts down,
+        # and flushing at the end of each application context so errors still go out promptly
+        atexit.register(buffered_mail_handler.flush)
 
-    #using RotatingFileHandler to rotate the logs, ensuring that the log files do not grow too large when the application runs for a long time
-    file_handler = RotatingFileHandler(
-        'logs/microblog.log',# writing the log file with name microblog.log in a logs directory
+        @app.teardown_appcontext
+        def flush_error_mail(exception=None):
+            buffered_mail_handler.flush()
+
+
+    # the code below provides functionality for logging errors to a file
+    # creating the logs folder if it doesn't exist yet. os.makedirs with exist_ok=True does the
+    # check and the creation in one atomic call (no separate stat syscall, no window for another
+    # worker on the same host to race us between the check and the mkdir)
+    os.makedirs(app.config['LOG_DIR'], exist_ok=True)
+
+    #using the BufferedRotatingFileHandler subclass to rotate the logs, ensuring that the log files do not grow too large when the application runs for a long time.
+    #the subclass additionally writes through a 64 KiB buffer (flushed every 30s, immediately on errors, and at exit)
+    #so that many log records are coalesced into one write() syscall instead of one syscall per record
+    from app.log_handlers import BufferedRotatingFileHandler
+    file_handler = BufferedRotatingFileHandler(
+        os.path.join(app.config['LOG_DIR'], 'microblog.log'),# writing the log file with name microblog.log in the configured log directory
         maxBytes=10240,#limiting the size of the log file to 10KB
         backupCount=10)#keeping only the last 10 log files as backup
     
     # The logging.Formatter class provides custom formatting for the log messages.
     # Since these messages are going to a file, I want them to have as much information as possible.
     # So I'm using a format that includes the timestamp, the logging level, the message and the source file and line number from where the log entry originated.
-    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
+    # The format uses str.format style (style='{') instead of %-style: per record it goes through
+    # str.format_map rather than the percent-formatting machinery, which is slightly cheaper on
+    # a handler that sees every INFO record the application emits.
+    file_handler.setFormatter(logging.Formatter(
+        '{asctime} {levelname}: {message} [in {pathname}:{lineno}]', style='{'))
 
     # To make the logging more useful, I'm also lowering the logging level to the INFO category, both in the application logger and the file logger handler.
     # The logging categories are DEBUG, INFO, WARNING, ERROR and CRITICAL in increasing order of severity.
     file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
+
+    # Rather than attaching the file (and mail) handlers directly to app.logger, the handlers run
+    # inside a background QueueListener thread. The only handler attached to app.logger is a
+    # QueueHandler, whose emit() just puts the record on an in-memory queue - so the request thread
+    # never blocks on disk writes, log rotation or SMTP traffic.
+    from logging.handlers import QueueHandler, QueueListener
+    import atexit
+    import queue
+
+    log_queue = queue.Queue(-1)# -1 means the queue is unbounded, so logging never blocks the producer
+    app.logger.addHandler(QueueHandler(log_queue))
+
+    # the listener pulls records off the queue on its own thread and dispatches them to the real handlers.
+    # respect_handler_level=True makes the listener honour each handler's own level
+    # (INFO for the file, ERROR for the mail buffer) instead of sending everything everywhere.
+    queue_targets = [file_handler]
+    if app.config['MAIL_SERVER']:
+        queue_targets.append(buffered_mail_handler)
+    queue_listener = QueueListener(
+        log_queue, *queue_targets, respect_handler_level=True)
+    queue_listener.start()
+    # stopping the listener at exit drains any records still sitting on the queue
+    atexit.register(queue_listener.stop)
 
     app.logger.setLevel(logging.INFO)
     app.logger.info('Microblog startup')
 
-from app import routes, models, errors
\ No newline at end of file
+    # marking logging as set up for the idempotency guard at the top of this block
+    app._logging_initialized = True
+
+# The models module is always imported: it defines the user loader that Flask-Login needs
+# and the table metadata that 'flask db migrate' introspects.
+from app import models
+
+
+# Registering the view functions and error handlers lives in its own function so that it can
+# be skipped entirely for invocations that never serve a request. Importing app.routes pulls
+# in the forms module, WTForms field construction and every view function - pure overhead for
+# a 'flask db upgrade' run in a deploy script or a one-off management command.
+def register_views():
+    from app import routes
+
+    # error handlers are registered explicitly (rather than at errors.py import time via
+    # decorators), now that the app object is fully configured
+    from app.errors import init_errors
+    init_errors(app, db)
+
+
+# Views are registered by default so 'from app import app' keeps working everywhere
+# (the dev server, WSGI entrypoints, the tests). CLI-only processes can export
+# MICROBLOG_SKIP_VIEWS=1 to shave the view/form import cost off their startup.
+if not os.environ.get('MICROBLOG_SKIP_VIEWS'):
+    register_views()
\ No newline at end of file
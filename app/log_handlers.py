@@ -0,0 +1,201 @@
+# Custom logging handlers used by the application logger set up in app/__init__.py
+
+# atexit lets us register cleanup functions that run when the Python process exits,
+# which we use to close the pooled SMTP connection cleanly
+import atexit
+
+# io provides the buffered file primitives used by BufferedRotatingFileHandler
+import io
+
+import logging
+from logging.handlers import RotatingFileHandler, SMTPHandler
+
+# os.path is used to pick up the size of an existing log file when (re)opening it
+import os
+
+import smtplib
+
+# threading is used for the background timer that periodically flushes the buffered log file
+import threading
+
+
+# The stock SMTPHandler opens a brand new SMTP connection for every single log record,
+# which means every error pays for a full TCP + TLS + AUTH handshake with the mail server.
+# Worse, emit() runs synchronously on the thread that is handling the web request,
+# so during an error burst the request thread spends most of its time re-connecting to the mail server.
+# This subclass keeps one persistent smtplib.SMTP connection open for the lifetime of the process,
+# so the handshake cost is paid once and then amortized across every error email that follows.
+class PooledSMTPHandler(SMTPHandler):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # the cached SMTP connection. It starts out as None and is opened lazily on the first emit,
+        # so simply constructing the handler (e.g. at import time) never touches the network
+        self._smtp = None
+
+        # making sure the connection is closed politely (with a QUIT) when the process shuts down
+        atexit.register(self._close)
+
+    # opens a fresh connection to the mail server and performs the TLS and AUTH steps,
+    # mirroring what the stock SMTPHandler.emit() does on every record, but only once here
+    def _connect(self):
+        port = self.mailport or smtplib.SMTP_PORT
+        smtp = smtplib.SMTP(self.mailhost, port, timeout=self.timeout)
+        if self.username:
+            # the secure attribute is the same tuple that the stock handler uses to decide
+            # whether to issue STARTTLS before logging in
+            if self.secure is not None:
+                smtp.ehlo()
+                smtp.starttls(*self.secure)
+                smtp.ehlo()
+            smtp.login(self.username, self.password)
+        return smtp
+
+    # returns a live connection, probing the cached one with a NOOP first.
+    # If the server has dropped the idle connection in the meantime (very common with mail servers),
+    # the probe fails and we transparently reconnect
+    def _get_connection(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPException, OSError):
+                # the cached connection has gone stale, throw it away and reconnect below
+                self._close()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                # the connection may already be gone, in which case there is nothing to quit
+                pass
+            self._smtp = None
+
+    # Same observable behaviour as SMTPHandler.emit(), except the connection is reused
+    # across records instead of being opened and torn down per record
+    def emit(self, record):
+        try:
+            import email.utils
+            from email.message import EmailMessage
+
+            msg = EmailMessage()
+            msg['From'] = self.fromaddr
+            msg['To'] = ','.join(self.toaddrs)
+            msg['Subject'] = self.getSubject(record)
+            msg['Date'] = email.utils.localtime()
+            msg.set_content(self.format(record))
+            try:
+                self._get_connection().send_message(msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # the server disconnected between the NOOP probe and the send,
+                # retry exactly once on a brand new connection before giving up
+                self._close()
+                self._get_connection().send_message(msg)
+        except Exception:
+            self.handleError(record)
+
+# The stock RotatingFileHandler opens its log file with ordinary (line buffered) text mode,
+# so every emit() translates into a write() syscall. On a busy endpoint that logs at INFO level
+# this puts one syscall per record on the logging path.
+# This subclass swaps the underlying stream for a large (64 KiB) BufferedWriter, so many records
+# are coalesced into a single write() syscall. Two stock behaviours would silently defeat that
+# buffer and both are overridden here:
+#  - StreamHandler.emit() calls self.flush() after every record, so flush() below is a no-op
+#    on the emit path and the real flushing moved to _real_flush();
+#  - RotatingFileHandler.shouldRollover() seeks the stream to learn the file size per record,
+#    and seeking a BufferedWriter flushes it, so the file size is tracked in a plain counter
+#    instead.
+# To keep the file reasonably fresh the buffer is flushed by a background timer every
+# 30 seconds, immediately for anything ERROR or worse, and once more at process exit so
+# nothing is lost on shutdown.
+class BufferedRotatingFileHandler(RotatingFileHandler):
+
+    # how often (in seconds) the background timer flushes the buffer to disk
+    FLUSH_INTERVAL = 30
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # making sure whatever is sitting in the buffer reaches the disk when the process exits
+        atexit.register(self._real_flush)
+
+        # daemon timer thread that flushes the buffer periodically.
+        # Using a daemon thread means it never prevents the interpreter from shutting down.
+        self._flush_timer = threading.Thread(
+            target=self._flush_periodically, daemon=True)
+        self._flush_timer.start()
+
+    # replaces the default line-buffered text stream with a 64 KiB BufferedWriter.
+    # The rollover machinery in RotatingFileHandler calls _open() again after rotating,
+    # so rotated files get the same buffered treatment.
+    def _open(self):
+        # the size counter starts from whatever is already in the file, so appending to an
+        # existing log after a restart still rolls over at the right point
+        self._size = os.path.getsize(self.baseFilename) \
+            if os.path.exists(self.baseFilename) else 0
+        return io.TextIOWrapper(
+            io.BufferedWriter(
+                io.FileIO(self.baseFilename, 'a'),
+                buffer_size=65536),
+            encoding=self.encoding or 'utf-8',
+            # write_through=False lets the text wrapper also defer to the buffer below it
+            write_through=False)
+
+    # Overridden to answer from the tracked byte counter. The stock implementation calls
+    # self.stream.seek(0, 2) to measure the file, and a seek forces the BufferedWriter to
+    # flush - one syscall per record, exactly what this class exists to avoid.
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes > 0:
+            # the record is formatted here and again in emit(); the stock handler pays the
+            # same double format, and it's the price of sizing the rollover decision
+            pending = len((self.format(record) + self.terminator)
+                          .encode(self.encoding or 'utf-8'))
+            if self._size + pending >= self.maxBytes:
+                return True
+        return False
+
+    # No-op on purpose: StreamHandler.emit() calls flush() after every single record, which
+    # would empty the buffer per record and reduce all of the above to overhead. Everything
+    # that genuinely needs bytes on disk (the timer, ERROR records, rollover, close() via
+    # the TextIOWrapper, process exit) goes through _real_flush() instead.
+    def flush(self):
+        pass
+
+    def _real_flush(self):
+        self.acquire()
+        try:
+            if self.stream and not self.stream.closed:
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def emit(self, record):
+        super().emit(record)
+        try:
+            self._size += len((self.format(record) + self.terminator)
+                              .encode(self.encoding or 'utf-8'))
+        except Exception:
+            # formatting already succeeded in super().emit() or was routed to handleError;
+            # never let size accounting take the logging path down
+            pass
+
+        # errors should be visible on disk immediately (e.g. for anyone tailing the log
+        # while debugging an incident), so they bypass the 30 second flush window
+        if record.levelno >= logging.ERROR:
+            self._real_flush()
+
+    def _flush_periodically(self):
+        while True:
+            # time.sleep would work equally well here, Event.wait just keeps it interruptible
+            threading.Event().wait(self.FLUSH_INTERVAL)
+            try:
+                self._real_flush()
+            except ValueError:
+                # the stream has been closed (e.g. during interpreter shutdown), stop flushing
+                break
@@ -1,8 +1,9 @@
 # Centralised module to manage routes throughout the web application
 
-from flask import render_template, flash, redirect, url_for, request
+from flask import render_template, flash, redirect, url_for, request, g, abort, session
 
-from urllib.parse import urlsplit
+# lru_cache backs the memoized URL helper below
+from functools import lru_cache
 
 from app import app
 
@@ -12,13 +13,43 @@ from app.forms import LoginForm, RegistrationForm, EditProfileForm, EmptyForm, P
 # importing modules required for user login routing
 from flask_login import current_user, login_user, logout_user, login_required
 import sqlalchemy as sa
+import sqlalchemy.orm as so
 from app import db
 
 
 from app.models import User, Post
 
-# importing datetime for datetime stamps, particularly to record when a user was last seen
-from datetime import datetime, timezone
+# TTL cache backing the last_seen write throttle below when Redis is not configured
+from cachetools import TTLCache
+
+# Memoized url_for for endpoints that take no parameters. Every redirect in the auth and
+# follow flows targets 'index' or 'login', and each plain url_for call walks Werkzeug's URL
+# map and rebuilds the same string. For parameter-free endpoints the result never changes
+# over the life of the process, so it is resolved once and remembered. Parameterized URLs
+# (like the user profile) keep calling url_for directly. The first call must happen inside
+# a request context, which is where all the call sites below live anyway.
+@lru_cache(maxsize=None)
+def _url(endpoint):
+    return url_for(endpoint)
+
+
+# TTL for the cached rendered feed page below. Short on purpose: a followed user's new
+# post can be up to this many seconds late on someone else's feed, which is acceptable
+# for a timeline; the user's OWN posts invalidate the cache explicitly, so they always
+# appear immediately.
+_FEED_CACHE_TTL = 30
+
+
+# Cache key for a user's rendered feed page. The key includes the session id, not just the
+# user id: the rendered HTML embeds the session's CSRF token in the post form, and the same
+# user logged in from two browsers has two sessions with two different tokens - serving one
+# session's cached page to the other would make its form submission fail CSRF validation.
+# The sid attribute exists because the cache is only active when REDIS_URL is set, which is
+# the same switch that enables Flask-Session's server-side sessions; if it's somehow absent
+# the caller skips the cache for that request.
+def _feed_cache_key(uid):
+    sid = getattr(session, 'sid', None)
+    return 'feed:{}:{}'.format(uid, sid) if sid else None
 
 
 @app.route('/', methods=['GET', 'POST'])
@@ -32,27 +63,48 @@ def index():
         post = Post(body=form.post.data, author=current_user)
         db.session.add(post)
         db.session.commit()
+
+        # this session's cached feed page is now stale - drop it so the new post shows
+        # up on the very next render instead of after the TTL. The same user's OTHER
+        # sessions keep their cached page for the remaining TTL, same as any follower's.
+        if app.config['REDIS_URL']:
+            stale_key = _feed_cache_key(current_user.id)
+            if stale_key:
+                app.config['SESSION_REDIS'].delete(stale_key)
+
         flash('Your post is now live!')
-        return redirect(url_for('index'))
-
-    posts = [
-        {
-            'author': {'username': 'John'},
-            'body': 'Beautiful day in Portland!'
-        },
-        {
-            'author': {'username': 'Susan'},
-            'body': 'The Avengers movie was so cool!'
-        }
-    ]
-
-    # return('hey there')
-    return render_template(
+        return redirect(_url('index'))
+
+    # Cache-aside for the fully rendered page, only when Redis is configured. On a hit
+    # the whole request is one Redis GET - no feed query, no Jinja render. The cache is
+    # skipped when there are pending flash messages (caching a page with a one-shot
+    # message would replay it) or when the form failed validation (the page must show
+    # this request's errors). The key is per-session (see _feed_cache_key above), so a
+    # cached page is only ever served back to the session whose CSRF token it embeds.
+    cache_key = _feed_cache_key(current_user.id) if app.config['REDIS_URL'] else None
+    cacheable = (cache_key is not None and request.method == 'GET'
+                 and not form.errors and not session.get('_flashes'))
+    if cacheable:
+        cached_page = app.config['SESSION_REDIS'].get(cache_key)
+        if cached_page is not None:
+            return cached_page.decode('utf-8')
+
+    # the real timeline: own posts plus posts from followed users, newest first.
+    # following_posts() already carries its loader options - the deferred body is
+    # undeferred and the page's authors are batch-loaded with selectinload, so rendering
+    # the feed costs two queries no matter how many posts are shown (Post.author is
+    # lazy='raise_on_sql', so an accidental per-row load would raise, not slip through)
+    posts = db.session.scalars(current_user.following_posts()).all()
+
+    page = render_template(
         'index.html',
         title='Home Page',
         form=form,
         posts=posts
     )
+    if cacheable:
+        app.config['SESSION_REDIS'].setex(cache_key, _FEED_CACHE_TTL, page)
+    return page
         
 
 
@@ -67,21 +119,17 @@ def login():
     if current_user.is_authenticated:
 
         # if user is already logged in, but somehow navigates to the /login URL of the app, we redirect them to index
-        return redirect(url_for('index'))
+        return redirect(_url('index'))
 
     #using the LoginForm class to create a form
     form = LoginForm()
 
     #accept and validate user submitted data for login
+    # (an old debugging flash that echoed the submitted username used to live here; it ran
+    # on EVERY login POST, forcing a session write - a cookie re-sign, or a Redis SET under
+    # server-side sessions - and leaked the attempted username into the next rendered page)
     if form.validate_on_submit():
 
-        # old code for debugging. used flash messages in place of actually logging the user in,
-        # while user models did not exist at the time
-        flash('Login requested for user {}, remember_me={}'.format(
-            form.username.data, form.remember_me.data
-        )
-        )
-
         # uses submitted login form data to check db and load user data if it is a match
         # calling db.session.scalar(), will return the user object if it exists, or None.
         # IMPORTANT! The db.session.scalar() method assumes there is only going to be one or zero results
@@ -93,7 +141,7 @@ def login():
             flash('Invalid username or password')
 
             # redirecting user to login when if the conditions above are met
-            return redirect(url_for('login'))
+            return redirect(_url('login'))
         
         # if username and password are both correct, call the login_user() function, which comes from Flask-Login. This function will register the user as logged in,
         # so that means that any future pages the user navigates to will have the current_user variable set to that user.
@@ -105,9 +153,15 @@ def login():
         next_page = request.args.get('next')
 
         # If the login URL does not have a next argument, then the user is redirected to the index page.
-        # To determine if the URL is absolute or relative (to protect from attackers), parse with Python's urlsplit() function and then check if the netloc component is set or not.
-        if not next_page or urlsplit(next_page).netloc != '':
-            next_page = url_for('index')
+        # To protect from attackers, only same-site relative paths are accepted as the next
+        # target. This used to parse the value with urlsplit() and check that the netloc
+        # component is empty, but the direct prefix check below is both cheaper (no URL parse
+        # on a value the attacker controls the length of) and stricter: it also rejects
+        # scheme-relative URLs like '//evil.com' outright, instead of trusting how a full
+        # parser happens to classify every ambiguous input.
+        if not next_page or not next_page.startswith('/') \
+                or next_page.startswith('//'):
+            next_page = _url('index')
 
         # redirect the newly logged in user
         # If the login URL includes a next argument that is set to a relative path (or in other words, a URL without the domain portion), then the user is redirected to that URL.
@@ -126,7 +180,7 @@ def logout():
 
     # logging out is done by Flask-Login through the logout_user() function
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(_url('index'))
 
 
 # routing and functionality to allow users to register
@@ -136,7 +190,7 @@ def register():
     # Check to make sure user is not already logged in.
     # If they are, redirect them to the index page
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(_url('index'))
     
     form = RegistrationForm()
 
@@ -148,11 +202,19 @@ def register():
         # writes the new user data to the database
         db.session.add(user)
         db.session.commit()
-        
+
+        # seed the taken-name caches in forms.py so an immediate re-registration attempt
+        # with the same details is rejected without another database query (keyed on the
+        # exact stored strings, matching the case-sensitive comparisons in the validators)
+        from app.forms import _taken_emails, _taken_usernames
+        _taken_usernames[user.username] = True
+        _taken_emails[user.email] = True
+
+
         flash('Congratulations, you are now a registered user!')
 
         # redirect to the login prompt so the user can log in
-        return redirect(url_for('login'))
+        return redirect(_url('login'))
     
     return render_template('register.html', title='Register', form=form)
 
@@ -165,14 +227,25 @@ def register():
 @login_required
 def user(username):#username argument is provided when user clicks on the 'Profile' button on the navbar. See base.html file
 
-    # db.first_or_404() works like scalar() when there are results, but in the case that there are no results it automatically sends 
-    # a 404 error back to the client. By executing the query in this way I save myself from checking if the query returned a user, 
-    # because when the username does not exist in the database the function will not return and instead a 404 exception will be raised.
-    user = db.first_or_404(sa.select(User).where(User.username == username))
-    posts = [
-        {'author': user, 'body': 'Test post #1'},
-        {'author': user, 'body': 'Test post #2'}        
-    ]
+    # User.by_username goes through the username -> id cache, so repeat visits to a
+    # profile resolve through the session identity map instead of re-running the
+    # SELECT ... WHERE username = ? each time. A missing user still sends a 404 back to
+    # the client, same as the db.first_or_404 call this replaces.
+    user = User.by_username(username)
+    if user is None:
+        abort(404)
+
+    # this user's posts, newest first. The WHERE + ORDER BY pair is exactly what the
+    # composite (user_id, timestamp DESC) index serves as a single reverse range scan.
+    # The deferred body column is undeferred up front since the page renders it, and
+    # selectinload satisfies the raise_on_sql Post.author relationship in one batched
+    # query (which is a no-op round trip in practice - the author is this very user,
+    # already sitting in the session's identity map).
+    posts = db.session.scalars(
+        sa.select(Post)
+        .options(so.undefer(Post.body), so.selectinload(Post.author))
+        .where(Post.user_id == user.id)
+        .order_by(Post.timestamp.desc())).all()
 
     # Rendering the follow or unfollow button by  instantiateing an EmptyForm object and pass it to the user.html template.
     # Because these two actions are mutually exclusive, we can pass a single instance of this generic form to the template
@@ -186,20 +259,59 @@ def user(username):#username argument is provided when user clicks on the 'Profi
 
 # The @before_request decorator from Flask register the decorated function to be executed right before the view function
 # This is extremely useful because now I can insert code that I want to execute before any view function in the application, and I can have it in a single place.
+# The hook used to assign last_seen and commit right here, which put an UPDATE plus a
+# transaction commit (an fsync, on SQLite) in front of EVERY authenticated view. Now it only
+# records the user id on flask.g - a dict write - and the actual database work happens in the
+# teardown hook below, after the response has been built.
 @app.before_request
 def before_request():
 
-    # checks if the current_user is logged in, and in that case sets the last_seen field to the current time
+    # checks if the current_user is logged in, and in that case marks the user to have
+    # their last_seen field refreshed once the request is done
     if current_user.is_authenticated:
-
-        # a server application needs to work in consistent time units, and the standard practice is to use the UTC time zone.
-        # It is not recommended to use local time
-        current_user.last_seen = datetime.now(timezone.utc)
-
-        # We can also specify db.session.add() before db.session.commit(), but it is not required here
-        # This is because when you reference current_user, Flask-Login will invoke the user loader callback function, 
-        # which will run a database query that will put the target user in the database session. 
-        # So you can add the user again in this function, but it is not necessary because it is already there.
+        g._seen_user_id = current_user.id
+
+
+# last_seen is only precise to "roughly now" - nothing reads it at sub-minute resolution -
+# so there is no reason to write it more than once a minute per user. The throttle marker
+# lives in Redis when one is configured (SET NX EX is a single atomic probe-and-claim that
+# works across worker processes); otherwise a per-process TTL cache serves the same purpose
+# for the single-process deployments that run without Redis.
+_LAST_SEEN_INTERVAL = 60
+_seen_recently = TTLCache(maxsize=100_000, ttl=_LAST_SEEN_INTERVAL)
+
+
+def _should_write_last_seen(uid):
+    if app.config['REDIS_URL']:
+        # True only for the one request that wins the claim within the interval
+        return bool(app.config['SESSION_REDIS'].set(
+            'seen:{}'.format(uid), 1, ex=_LAST_SEEN_INTERVAL, nx=True))
+    if uid in _seen_recently:
+        return False
+    _seen_recently[uid] = True
+    return True
+
+
+# The @teardown_request hook runs after the response has been generated, so the user never
+# waits on this write. The refresh is a single targeted UPDATE with the timestamp computed
+# by the database (SET last_seen = CURRENT_TIMESTAMP) - no ORM flush, no Python datetime.
+# (A per-second memoized datetime.now(timezone.utc) was considered for this path and is
+# unnecessary in this shape: the hot before_request hook never touches the clock at all,
+# and the rare throttled write delegates the timestamp to the database.)
+# Note that last_seen deliberately does NOT use onupdate=func.now(): that would silently
+# touch it on unrelated UPDATEs to the user row (e.g. the follower tally maintenance would
+# bump the FOLLOWED user's last_seen), which is the wrong meaning.
+@app.teardown_request
+def touch_last_seen(exception=None):
+    uid = g.pop('_seen_user_id', None)
+
+    # skip the write when the request blew up - the session may be in a failed state.
+    # The throttle turns a write-per-request into at most one write per user per minute,
+    # which under a busy session removes nearly all of the most frequent UPDATE (and its
+    # commit fsync) the application performs.
+    if uid is not None and exception is None and _should_write_last_seen(uid):
+        db.session.execute(sa.update(User).where(User.id == uid).values(
+            last_seen=sa.func.now()))
         db.session.commit()
 
 
@@ -211,12 +323,16 @@ def edit_profile():
 
     # If validate_on_submit() returns True I copy the data from the form into the user object and then write the object to the database
     if form.validate_on_submit():
+        # a rename makes any cached mapping for the old name stale; drop it so the next
+        # lookup under the old name misses instead of resolving to this user
+        if form.username.data != current_user.username:
+            User.forget_username(current_user.username)
         current_user.username = form.username.data
         current_user.about_me = form.about_me.data
         db.session.commit()
         flash('Your changes have been saved')
 
-        return redirect(url_for('edit_profile'))
+        return redirect(_url('edit_profile'))
     
     # when validate_on_submit() returns False it can be due to two different reasons. We need to treat these two cases separately.
     # First, it can be because the browser just sent a GET request. We respond to this by providing an initial version of the form template (by having the current stored data pre-filled in the fields)
@@ -239,27 +355,31 @@ def follow(username):
     form = EmptyForm()
 
     if form.validate_on_submit():
-        user = db.session.scalar(
-            sa.select(User).where(User.username == username)
-        )
+        # resolved through the username -> id cache (see User.by_username)
+        user = User.by_username(username)
 
         # some error checking before actually carrying out the follow or unfollow action.
         # This is to prevent unexpected issues, and to try to provide a useful message to the user when a problem has occurred.
         if user is None:
             flash(f'User {username} not found')
-            return redirect(url_for('index'))        
+            return redirect(_url('index'))        
         if user == current_user:
             flash('You cannot follow yourself')
             return redirect(url_for('user', username=username))
         
-        # using follow method from User model to follow another user
+        # using follow method from User model to follow another user.
+        # Everything follow() does - the conflict-proof association INSERT and both
+        # denormalized tally UPDATEs - rides in this one transaction, committed once here.
+        # The redirect that follows is cheap: the profile page resolves the user through
+        # the username cache and reads the counts straight off the user row, so no
+        # aggregate queries are re-run to show the updated state.
         current_user.follow(user)
         db.session.commit()
         flash(f'You are following {username}!')
         return redirect(url_for('user', username=username))
     
     else:
-        return redirect(url_for('index'))
+        return redirect(_url('index'))
     
 # Routing for unfollowing another user
 # Similar to routing for following another user. Refer to 'follow' method in routes.py for comments and info
@@ -268,22 +388,25 @@ def follow(username):
 def unfollow(username):
     form = EmptyForm()
     if form.validate_on_submit():
-        user = db.session.scalar(
-            sa.select(User).where(User.username == username)
-        )
+        # resolved through the username -> id cache (see User.by_username)
+        user = User.by_username(username)
 
         if user is None:
             flash(f'User {username} not found')
-            return redirect(url_for('index'))
+            return redirect(_url('index'))
         if user == current_user:
             flash('You cannot unfollow yourself!')
             return redirect(url_for('user', username=username))
         
-        # Method for this user to unfollow the other user
+        # Method for this user to unfollow the other user.
+        # Like follow(), this is SQL-level DML under the hood - one idempotent DELETE
+        # against the association table plus the tally updates, no relationship traversal
+        # and no existence pre-SELECT - kept inside the model per this app's convention of
+        # holding query logic out of the view functions.
         current_user.unfollow(user)
         db.session.commit()
         flash(f'You are not following {username}')
         return redirect(url_for('user', username=username))
     
     else:
-        return redirect(url_for('index'))
\ No newline at end of file
+        return redirect(_url('index'))
\ No newline at end of file
@@ -0,0 +1,25 @@
+# gunicorn configuration for running the application in production:
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# The routes are I/O-bound (database round trips, template rendering), so a single-threaded
+# server serializes requests behind the GIL while each one waits on the database. The
+# gthread worker class gives each of the prefork workers a small thread pool: threads
+# release the GIL while blocked on I/O, so concurrent requests overlap instead of queueing.
+
+import multiprocessing
+
+# the classic prefork sizing rule: enough workers that the host stays busy while some are
+# blocked, without oversubscribing memory
+workers = 2 * multiprocessing.cpu_count() + 1
+
+# threads per worker; modest, because each thread can hold a pooled database connection
+# (keep workers * threads in line with the pool_size + max_overflow in config.py)
+threads = 4
+worker_class = 'gthread'
+
+bind = '0.0.0.0:8000'
+
+# recycle workers periodically so any slow leak (or fragmented heap) clears itself;
+# the jitter keeps all workers from restarting at the same moment
+max_requests = 1000
+max_requests_jitter = 50
@@ -11,6 +11,8 @@ import os
 os.environ['DATABASE_URL'] = 'sqlite://'
 
 from datetime import datetime, timezone, timedelta
+import ast
+import glob
 import unittest
 from app import app, db
 from app.models import User, Post
@@ -113,5 +115,25 @@ class UserModelCase(unittest.TestCase):
         self.assertEqual(f4, [p4])
 
 
+# Guard against a module defining the same top-level class twice (e.g. a bad merge pasting
+# a second copy of a model). Python would silently keep the later definition, and for
+# SQLAlchemy models that means a second mapper configuration against the same table -
+# doubled import-time work at best, metadata conflicts at worst. Parsing the source with
+# ast catches it without importing anything.
+class ModuleSanityCase(unittest.TestCase):
+
+    def test_no_duplicate_toplevel_classes(self):
+        for path in glob.glob('app/**/*.py', recursive=True):
+            with open(path) as source:
+                tree = ast.parse(source.read(), filename=path)
+            seen = set()
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef):
+                    self.assertNotIn(
+                        node.name, seen,
+                        f'{path} defines class {node.name} more than once')
+                    seen.add(node.name)
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
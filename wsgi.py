@@ -0,0 +1,5 @@
+# WSGI entry point for production servers.
+# Servers like gunicorn and uwsgi look for a module-level 'application' callable by
+# convention, so this module exposes the Flask instance under that name:
+#   gunicorn -c gunicorn.conf.py wsgi:application
+from app import app as application